@@ -1,14 +1,19 @@
 import os
 import re
+import asyncio
 import csv
+import time
+import functools
 from typing import Optional, List
 from dataclasses import dataclass
 from datetime import datetime
 
+from requests.adapters import HTTPAdapter
 from telethon import TelegramClient, events
 import oandapyV20
 import oandapyV20.endpoints.orders as orders
 import oandapyV20.endpoints.accounts as accounts
+import re2
 
 # -------- CONFIG --------
 API_ID = int(os.getenv("TELEGRAM_API_ID") or "0")
@@ -22,6 +27,20 @@ DRY_RUN = False   # 🚨 LIVE MODE
 # Risk sizing
 RISK_PER_TRADE = 0.01
 DEFAULT_UNITS = 100
+BALANCE_TTL = 30  # seconds a fetched account balance is reused
+
+# Concurrent order workers draining the order queue
+ORDER_WORKERS = 4
+
+# Max characters after an instrument token scanned for its signal fields
+SIGNAL_CHUNK_LEN = 200
+
+# Shared OANDA client: one requests.Session keeps TLS connections alive,
+# with a pool large enough for concurrently placed orders
+OANDA_CLIENT = None
+if OANDA_TOKEN:
+    OANDA_CLIENT = oandapyV20.API(access_token=OANDA_TOKEN)
+    OANDA_CLIENT.client.mount("https://", HTTPAdapter(pool_connections=16, pool_maxsize=16))
 
 # Log file
 LOG_FILE = "trades_log.csv"
@@ -45,13 +64,25 @@ INSTRUMENT_MAP = {
     "silver": "XAG_USD", "xagusd": "XAG_USD", "nas100": "NAS100_USD",
     "sp500": "SPX500_USD", "dow": "US30_USD"
 }
+_INSTRUMENT_KEYS = tuple(INSTRUMENT_MAP)
 
 # -------- Regex patterns --------
-SIDE_RE = re.compile(r"\b(buy|long|sell|short)\b", re.I)
-PRICE_RANGE_RE = re.compile(r"@?\s*([\d.,]+)\s*(?:-|to|/)\s*([\d.,]+)")
-SL_RE = re.compile(r"(?:sl|stoploss|stop loss)[:=\s]*([\d.,]+)", re.I)
-
-@dataclass
+SIDE_WORDS = ("buy", "sell", "long", "short")
+SIDE_RE = re.compile(r"(?i)\b(buy|long|sell|short)\b")
+# prices (here and in SL/TP) must start with a digit so a leading "," or
+# "." is never captured; a range is searched before falling back to one price
+PRICE_RANGE_RE = re.compile(r"(\d[\d.,]*)\s*(?:-|to|/)\s*(\d[\d.,]*)")
+SINGLE_PRICE_RE = re.compile(r"(\d[\d.,]*)")
+SL_RE = re.compile(r"(?i)(?:sl|stoploss|stop loss)[:=,\s]*(\d[\d.,]*)")
+# (?!\d) stops "tp2" from backtracking to "tp" and reading "2" as the price
+TP_RE = re.compile(r"(?i)(tp\d*|target)(?!\d)[:=,\s]*(\d[\d.,]*)")
+# longest keys first so e.g. "xauusd" wins over any shorter overlapping key;
+# this whole-message scan is the one pattern where RE2 beats stdlib re
+INSTRUMENT_ALT_RE = re2.compile(
+    r"(?i)\b(" + "|".join(re.escape(k) for k in sorted(_INSTRUMENT_KEYS, key=len, reverse=True)) + r")\b"
+)
+
+@dataclass(slots=True)
 class TradeSignal:
     side: str
     instrument: str
@@ -66,72 +97,90 @@ def parse_number(s: str) -> float:
     s = s.replace(",", "").strip()
     return float(s)
 
+@functools.lru_cache(maxsize=256)
 def normalize_instrument(token: str) -> Optional[str]:
-    t = token.lower().replace(" ", "").replace("-", "").replace("_", "")
+    # callers pass tokens taken from the already-lowered message text
+    t = token.replace(" ", "").replace("-", "").replace("_", "")
     return INSTRUMENT_MAP.get(t)
 
 # -------- Multi-signal Parser --------
+def _parse_single(txt: str, txt_low: str, start: int, inst: str) -> Optional[TradeSignal]:
+    # signal block runs from the end of the token match to the next '#',
+    # bounded in length
+    end = txt_low.find("#", start, start + SIGNAL_CHUNK_LEN)
+    if end == -1:
+        end = start + SIGNAL_CHUNK_LEN
+    chunk = txt_low[start:end]
+
+    m_side = SIDE_RE.search(chunk)
+    if not m_side:
+        return None
+    side_raw = m_side.group(1).lower()
+    side = "buy" if side_raw in ("buy", "long") else "sell"
+
+    entry_min = entry_max = None
+    m_range = PRICE_RANGE_RE.search(chunk)
+    if m_range:
+        entry_min = parse_number(m_range.group(1))
+        entry_max = parse_number(m_range.group(2))
+    else:
+        m_single = SINGLE_PRICE_RE.search(chunk)
+        if m_single:
+            entry_min = entry_max = parse_number(m_single.group(1))
+
+    m_sl = SL_RE.search(chunk)
+    sl = parse_number(m_sl.group(1)) if m_sl else None
+
+    tps = []
+    for m in TP_RE.finditer(chunk):
+        try:
+            tps.append(parse_number(m.group(2)))
+        except ValueError:
+            pass
+
+    if not tps:
+        for m in TP_RE.finditer(txt):
+            try:
+                tps.append(parse_number(m.group(2)))
+            except ValueError:
+                pass
+
+    return TradeSignal(side=side, instrument=inst,
+                       entry_min=entry_min, entry_max=entry_max,
+                       sl=sl, tps=tps or [])
+
 def parse_signals(text: str) -> List[TradeSignal]:
-    txt = text.replace("\n", " ").strip()
+    txt = text.replace("\n", " ").replace("\r", " ").replace("\t", " ").strip()
     txt_low = txt.lower()
     signals = []
 
-    # Identify instrument tokens
-    instrument_candidates = []
-    for key in INSTRUMENT_MAP.keys():
-        if key in txt_low:
-            instrument_candidates.append((key, INSTRUMENT_MAP[key]))
+    # cheap substring pre-checks: most chat messages are not signals at all
+    if not any(w in txt_low for w in SIDE_WORDS):
+        return signals
+    if not any(key in txt_low for key in _INSTRUMENT_KEYS):
+        return signals
 
-    for m in re.finditer(r"#?([A-Za-z]{3,6})([A-Za-z]{3,6})?", text):
-        token = (m.group(1) + (m.group(2) or "")).lower()
+    # Identify instrument tokens, keeping where each match ends so the
+    # signal chunk is sliced from that exact occurrence
+    instrument_candidates = []
+    seen = set()
+    for m in INSTRUMENT_ALT_RE.finditer(txt_low):
+        cand = (m.group(1), INSTRUMENT_MAP[m.group(1)])
+        if cand not in seen:
+            seen.add(cand)
+            instrument_candidates.append((cand[1], m.end()))
+
+    for m in re.finditer(r"#?([A-Za-z]{3,6})([A-Za-z]{3,6})?", txt_low):
+        token = m.group(1) + (m.group(2) or "")
         inst = normalize_instrument(token)
-        if inst and (token, inst) not in instrument_candidates:
-            instrument_candidates.append((token, inst))
+        if inst and (token, inst) not in seen:
+            seen.add((token, inst))
+            instrument_candidates.append((inst, m.end()))
 
-    for token, inst in instrument_candidates:
-        pattern = re.compile(rf"({token})[^A-Za-z0-9]*([^#]+)", re.I)
-        match = pattern.search(txt)
-        if not match:
-            continue
-        chunk = match.group(0)
-
-        m_side = SIDE_RE.search(chunk)
-        if not m_side:
-            continue
-        side_raw = m_side.group(1).lower()
-        side = "buy" if side_raw in ("buy", "long") else "sell"
-
-        entry_min = entry_max = None
-        m_range = PRICE_RANGE_RE.search(chunk)
-        if m_range:
-            entry_min = parse_number(m_range.group(1))
-            entry_max = parse_number(m_range.group(2))
-        else:
-            m_single = re.search(r"@?\s*([\d.,]+)", chunk)
-            if m_single:
-                entry_min = entry_max = parse_number(m_single.group(1))
-
-        m_sl = SL_RE.search(chunk)
-        sl = parse_number(m_sl.group(1)) if m_sl else None
-
-        tps = []
-        for m in re.finditer(r"(tp\d*|target)[:=\s]*([\d.,]+)", chunk, re.I):
-            try:
-                tps.append(parse_number(m.group(2)))
-            except:
-                pass
-
-        if not tps:
-            for m in re.finditer(r"(tp\d*|target)[:=\s]*([\d.,]+)", txt, re.I):
-                try:
-                    tps.append(parse_number(m.group(2)))
-                except:
-                    pass
-
-        sig = TradeSignal(side=side, instrument=inst,
-                          entry_min=entry_min, entry_max=entry_max,
-                          sl=sl, tps=tps or [])
-        signals.append(sig)
+    for inst, start in instrument_candidates:
+        sig = _parse_single(txt, txt_low, start, inst)
+        if sig:
+            signals.append(sig)
 
     return signals
 
@@ -152,41 +201,50 @@ def calc_units(balance: float, signal: TradeSignal) -> int:
     return int(units if signal.side == "buy" else -units)
 
 # -------- Trade logging --------
-def log_trade(signal: TradeSignal, source: str, units: int, mode: str):
-    file_exists = os.path.isfile(LOG_FILE)
-
-    with open(LOG_FILE, mode="a", newline="") as f:
-        writer = csv.writer(f)
-        if not file_exists:
-            writer.writerow([
+_LOG_FH = None
+_LOG_WRITER = None
+
+def _log_writer():
+    global _LOG_FH, _LOG_WRITER
+    if _LOG_WRITER is None:
+        # opened once and kept for the process lifetime; line buffering
+        # still flushes every row as it is written
+        _LOG_FH = open(LOG_FILE, mode="a", newline="", buffering=1)
+        _LOG_WRITER = csv.writer(_LOG_FH)
+        if _LOG_FH.tell() == 0:
+            _LOG_WRITER.writerow([
                 "timestamp", "source", "instrument", "side", "units",
                 "entry_min", "entry_max", "stop_loss", "take_profits", "mode"
             ])
+    return _LOG_WRITER
 
-        writer.writerow([
-            datetime.utcnow().isoformat(),
-            source,
-            signal.instrument,
-            signal.side,
-            units,
-            signal.entry_min,
-            signal.entry_max,
-            signal.sl,
-            "|".join(map(str, signal.tps)) if signal.tps else "",
-            mode
-        ])
+def log_trade(signal: TradeSignal, source: str, units: int, mode: str):
+    _log_writer().writerow([
+        datetime.utcnow().isoformat(),
+        source,
+        signal.instrument,
+        signal.side,
+        units,
+        signal.entry_min,
+        signal.entry_max,
+        signal.sl,
+        "|".join(map(str, signal.tps)) if signal.tps else "",
+        mode
+    ])
 
 # -------- Order execution --------
-async def execute_order(signal: TradeSignal, source: str):
-    client = oandapyV20.API(access_token=OANDA_TOKEN)
-
-    # fetch account balance
-    r_acc = accounts.AccountDetails(OANDA_ACCOUNT_ID)
-    client.request(r_acc)
-    balance = float(r_acc.response["account"]["balance"])
-
-    units = calc_units(balance, signal)
-
+_balance_cache = {"value": None, "ts": 0.0}
+
+async def get_balance(client) -> float:
+    now = time.monotonic()
+    if _balance_cache["value"] is None or now - _balance_cache["ts"] > BALANCE_TTL:
+        r_acc = accounts.AccountDetails(OANDA_ACCOUNT_ID)
+        await asyncio.to_thread(client.request, r_acc)
+        _balance_cache["value"] = float(r_acc.response["account"]["balance"])
+        _balance_cache["ts"] = now
+    return _balance_cache["value"]
+
+def build_order(signal: TradeSignal, units: int) -> dict:
     order_data = {
         "order": {
             "instrument": signal.instrument,
@@ -202,19 +260,78 @@ async def execute_order(signal: TradeSignal, source: str):
     if signal.tps:
         order_data["order"]["takeProfitOnFill"] = {"price": str(signal.tps[0])}
 
+    return order_data
+
+async def execute_orders(signals: List[TradeSignal], source: str):
+    client = OANDA_CLIENT
+    if client is None:
+        raise RuntimeError("Set OANDA_API_TOKEN environment variable.")
+
+    # one (possibly cached) balance for every signal in the message
+    balance = await get_balance(client)
+
+    sized = [(signal, calc_units(balance, signal)) for signal in signals]
+
     if DRY_RUN:
-        print(f"[DRY RUN] {source} → {signal.side.upper()} {signal.instrument} "
-              f"units={units} SL={signal.sl} TP={signal.tps}")
-        log_trade(signal, source, units, "DRY_RUN")
+        for signal, units in sized:
+            print(f"[DRY RUN] {source} → {signal.side.upper()} {signal.instrument} "
+                  f"units={units} SL={signal.sl} TP={signal.tps}")
+            log_trade(signal, source, units, "DRY_RUN")
         return
 
-    r = orders.OrderCreate(OANDA_ACCOUNT_ID, data=order_data)
-    client.request(r)
-    print("Order executed:", r.response)
-
-    log_trade(signal, source, units, "LIVE")
+    # place all orders concurrently; one failure must not drop the others
+    reqs = [orders.OrderCreate(OANDA_ACCOUNT_ID, data=build_order(signal, units))
+            for signal, units in sized]
+    results = await asyncio.gather(
+        *(asyncio.to_thread(client.request, r) for r in reqs),
+        return_exceptions=True
+    )
+
+    for (signal, units), r, result in zip(sized, reqs, results):
+        if isinstance(result, Exception):
+            print(f"Order failed for {signal.instrument}:", result)
+            continue
+        print("Order executed:", r.response)
+        log_trade(signal, source, units, "LIVE")
+
+async def order_worker(queue: asyncio.Queue):
+    while True:
+        signals, source = await queue.get()
+        try:
+            await execute_orders(signals, source)
+        except Exception as e:
+            print("Order execution failed:", e)
+        finally:
+            queue.task_done()
 
 # -------- Telegram client --------
+# handler only enqueues; workers place orders so a slow OANDA
+# response never delays reading the next message
+ORDER_Q: asyncio.Queue = asyncio.Queue()
+
+async def handler(event):
+    # 🚫 skip chats we don't follow before doing any other work
+    sender = ALLOWED_CHATS.get(event.chat_id)
+    if sender is None:
+        return
+
+    # 🚫 skip forwarded messages
+    if event.message.fwd_from:
+        return
+
+    text = event.message.message or ""
+
+    print(f"\nNew message from [{sender}]: {text}")
+
+    sigs = parse_signals(text)
+    if not sigs:
+        print("No actionable trade signals detected.")
+        return
+
+    for sig in sigs:
+        print("Parsed signal:", sig)
+    ORDER_Q.put_nowait((sigs, sender))
+
 async def main_loop():
     tg_id = int(os.getenv("TELEGRAM_API_ID") or API_ID)
     tg_hash = os.getenv("TELEGRAM_API_HASH") or API_HASH
@@ -225,34 +342,16 @@ async def main_loop():
     await client.start()
     print("Telegram client started. Listening for messages...")
 
-    @client.on(events.NewMessage(incoming=True))
-    async def handler(event):
-        # 🚫 skip forwarded messages
-        if event.message.fwd_from:
-            return
-
-        text = event.message.message or ""
-        chat = await event.get_chat()
-        sender = getattr(chat, "title", None) or getattr(chat, "username", None) or str(event.chat_id)
+    workers = [asyncio.create_task(order_worker(ORDER_Q)) for _ in range(ORDER_WORKERS)]
+    client.add_event_handler(handler, events.NewMessage(incoming=True))
 
-        if event.chat_id not in ALLOWED_CHATS:
-            return
-
-        print(f"\nNew message from [{sender}]: {text}")
-
-        sigs = parse_signals(text)
-        if not sigs:
-            print("No actionable trade signals detected.")
-            return
-
-        for sig in sigs:
-            print("Parsed signal:", sig)
-            await execute_order(sig, sender)
-
-    await client.run_until_disconnected()
+    try:
+        await client.run_until_disconnected()
+    finally:
+        for w in workers:
+            w.cancel()
 
 if __name__ == "__main__":
-    import asyncio
     print("Starting Telegram -> OANDA signal executor")
     print("DRY_RUN =", DRY_RUN)
     try:
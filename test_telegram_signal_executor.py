@@ -0,0 +1,68 @@
+from telegram_signal_executor import parse_signals
+
+
+def test_chunk_starts_at_word_bounded_match():
+    # "golden" must not be taken as the "gold" token
+    sigs = parse_signals("Golden week recap #GOLD buy 2000 sl 1990 tp 2010")
+    assert len(sigs) == 1
+    assert sigs[0].instrument == "XAU_USD"
+    assert sigs[0].side == "buy"
+    assert (sigs[0].entry_min, sigs[0].entry_max) == (2000.0, 2000.0)
+    assert sigs[0].sl == 1990.0
+    assert sigs[0].tps == [2010.0]
+
+
+def test_instrument_digits_not_taken_as_entry():
+    sigs = parse_signals("sp500 sell 5200 sl 5250")
+    assert len(sigs) == 1
+    assert sigs[0].instrument == "SPX500_USD"
+    assert sigs[0].entry_min == 5200.0
+
+
+def test_comma_after_token_with_slash_range():
+    sigs = parse_signals("GOLD, SELL 2350/2355 SL 2360 TP1 2340")
+    assert len(sigs) == 1
+    assert sigs[0].side == "sell"
+    assert (sigs[0].entry_min, sigs[0].entry_max) == (2350.0, 2355.0)
+    assert sigs[0].sl == 2360.0
+    assert sigs[0].tps == [2340.0]
+
+
+def test_comma_after_sl_label():
+    sigs = parse_signals("GOLD buy 2000 SL, 1990")
+    assert len(sigs) == 1
+    assert sigs[0].sl == 1990.0
+
+
+def test_tp_label_digits_not_taken_as_price():
+    sigs = parse_signals("nas100 short 18000 to 18050 stop loss 18100 tp1 17900 tp2 .")
+    assert len(sigs) == 1
+    assert sigs[0].tps == [17900.0]
+
+
+def test_comma_after_token_with_dash_range():
+    sigs = parse_signals("XAUUSD, buy 2000-2010 sl 1990")
+    assert len(sigs) == 1
+    assert (sigs[0].entry_min, sigs[0].entry_max) == (2000.0, 2010.0)
+    assert sigs[0].sl == 1990.0
+
+
+def test_range_preferred_over_earlier_timeframe_number():
+    sigs = parse_signals("XAUUSD M15 buy 2000-2010 sl 1990")
+    assert len(sigs) == 1
+    assert (sigs[0].entry_min, sigs[0].entry_max) == (2000.0, 2010.0)
+
+
+def test_single_price_with_thousands_separator():
+    sigs = parse_signals("Gold buy 2,350.5 sl 2,340 target 2,360")
+    assert len(sigs) == 1
+    assert (sigs[0].entry_min, sigs[0].entry_max) == (2350.5, 2350.5)
+    assert sigs[0].sl == 2340.0
+    assert sigs[0].tps == [2360.0]
+
+
+def test_non_breaking_space_after_sl_and_tp_labels():
+    sigs = parse_signals("GOLD buy 2000 SL:\xa01990 TP:\xa02010")
+    assert len(sigs) == 1
+    assert sigs[0].sl == 1990.0
+    assert sigs[0].tps == [2010.0]